@@ -5,9 +5,10 @@ Replaces the PowerShell script with pure Python implementation.
 """
 
 import os
+import re
 import sys
-import tempfile
-import shutil
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from typing import Optional, Tuple
 from concurrent.futures import ProcessPoolExecutor, as_completed
@@ -16,7 +17,7 @@ import multiprocessing
 # Import MarkItDown - handle both direct execution and module import
 try:
     # Try relative import first (when imported as module)
-    from .. import MarkItDown
+    from .. import MarkItDown, StreamInfo
 except ImportError:
     # If relative import fails, try absolute import (when run directly)
     import sys
@@ -28,7 +29,72 @@ except ImportError:
     src_dir = markitdown_package_dir.parent
     sys.path.insert(0, str(src_dir))
     
-    from markitdown import MarkItDown
+    from markitdown import MarkItDown, StreamInfo
+
+# Plain strings to find and their replacements (case-insensitive)
+_LITERAL_REPLACEMENTS = [
+    ("RESTRICTED, NON-SENSITIVE", ""),
+    ("RESTRICTED NON-SENSITIVE", ""),
+    ("RESTRICTED,NON-SENSITIVE", ""),
+    ("RESTRICTED - NON-SENSITIVE", ""),
+    ("RESTRICTED-NON-SENSITIVE", ""),
+    ("# File:", "File:"),
+    ("# Path:", "Path:"),
+]
+
+# Regex patterns to find and their replacements (case-insensitive)
+# Each pattern is paired with a lowercase substring that any match must
+# contain, so the regex only runs when that substring is present
+_REGEX_REPLACEMENTS = [
+    ("page ", re.compile(r'Page \d+ of \d+', re.IGNORECASE), ""),  # Page numbers
+    ("copyr", re.compile(r'Copyright.*\d{4}', re.IGNORECASE), ""),  # Copyright notices
+]
+
+# For each literal: its lowercase form, the casings realistically found in
+# documents (handled with str.replace), and a compiled fallback for mixed case
+_LITERAL_PATTERNS = [
+    (
+        needle.lower(),
+        tuple(dict.fromkeys((needle, needle.upper(), needle.title()))),
+        re.compile(re.escape(needle), re.IGNORECASE),
+        repl,
+    )
+    for needle, repl in _LITERAL_REPLACEMENTS
+]
+
+# Characters re.IGNORECASE treats as equal to letters of the cleanup strings
+# that str.lower() does not map to them (dotted/dotless i and long s)
+_IGNORECASE_EXTRAS = str.maketrans({'\u0130': 'i', '\u0131': 'i', '\u017f': 's'})
+
+_MULTI_BLANK = re.compile(r'\n{3,}')
+# Tabs are turned into spaces first, so only runs of two or more spaces need
+# rewriting and the single spaces in ordinary text are skipped
+_MULTI_SPACE = re.compile(r'  +')
+
+def _fold_case(content: str) -> str:
+    """
+    Lowercase content so that substring checks on it agree with
+    re.IGNORECASE matches of the cleanup strings.
+    """
+    # These checks are O(1) on Latin-1 text, which cannot hold the characters
+    if any(char in content for char in ('\u0130', '\u0131', '\u017f')):
+        content = content.translate(_IGNORECASE_EXTRAS)
+    return content.lower()
+
+def _replace_literal(content: str, lowered: str, literal_pattern: tuple) -> str:
+    """
+    Replace one literal case-insensitively, avoiding the regex engine when
+    every occurrence uses a single common casing.
+    """
+    needle_lower, casings, fallback, repl = literal_pattern
+    occurrences = lowered.count(needle_lower)
+    if not occurrences:
+        return content
+    for casing in casings:
+        if content.count(casing) == occurrences:
+            return content.replace(casing, repl)
+    # Mixed casings present, let the regex handle them all in one pass
+    return fallback.sub(repl, content)
 
 def clean_markdown_content(content: str) -> str:
     """
@@ -40,8 +106,6 @@ def clean_markdown_content(content: str) -> str:
     Returns:
         Cleaned markdown content
     """
-    import re
-    
     # Handle None or empty content
     if not content:
         return ""
@@ -50,132 +114,293 @@ def clean_markdown_content(content: str) -> str:
     if not isinstance(content, str):
         content = str(content)
     
-    # Map of strings to find and their replacements (case-insensitive)
-    # Key: string/pattern to find, Value: replacement string
-    string_replacements = {
-        "RESTRICTED, NON-SENSITIVE": "",
-        "RESTRICTED NON-SENSITIVE": "",
-        "RESTRICTED,NON-SENSITIVE": "",
-        "RESTRICTED - NON-SENSITIVE": "",
-        "RESTRICTED-NON-SENSITIVE": "",
-        "Page \\d+ of \\d+": "",  # Regex pattern for page numbers
-        "Copyright.*\\d{4}": "",  # Copyright notices
-        "# File:": "File:",
-        "# Path:": "Path:",
-    }
-    
     cleaned_content = content
     
-    # Apply each replacement
-    for find_pattern, replace_with in string_replacements.items():
-        # Check if it's a regex pattern (contains common regex characters)
-        if any(char in find_pattern for char in ['\\', '[', ']', '(', ')', '*', '+', '?', '.', '^', '$']):
-            # Use regex substitution
-            cleaned_content = re.sub(find_pattern, replace_with, cleaned_content, flags=re.IGNORECASE)
-        else:
-            # Simple case-insensitive replacement
-            # Escape the pattern for regex and replace all variations
-            cleaned_content = re.sub(re.escape(find_pattern), replace_with, cleaned_content, flags=re.IGNORECASE)
+    # Apply literal replacements, only re-lowering when something changed
+    lowered = _fold_case(cleaned_content)
+    for literal_pattern in _LITERAL_PATTERNS:
+        replaced = _replace_literal(cleaned_content, lowered, literal_pattern)
+        if replaced is not cleaned_content:
+            cleaned_content = replaced
+            lowered = _fold_case(cleaned_content)
     
-    # Clean up multiple blank lines (more than 2 consecutive)
-    cleaned_content = re.sub(r'\n{3,}', '\n\n', cleaned_content)
+    # Apply regex replacements, skipping any whose trigger text is absent
+    for needle, pattern, replace_with in _REGEX_REPLACEMENTS:
+        if needle not in lowered:
+            continue
+        cleaned_content, count = pattern.subn(replace_with, cleaned_content)
+        if count:
+            lowered = _fold_case(cleaned_content)
     
-    # Clean up multiple spaces
-    cleaned_content = re.sub(r'[ \t]+', ' ', cleaned_content)
+    # Clean up multiple spaces and tabs
+    cleaned_content = _MULTI_SPACE.sub(' ', cleaned_content.replace('\t', ' '))
     
-    # Clean up spaces at the beginning of lines (but preserve intentional indentation)
-    cleaned_content = re.sub(r'^[ \t]+$', '', cleaned_content, flags=re.MULTILINE)
+    # Strip trailing whitespace, which also empties whitespace-only lines. Runs
+    # were collapsed above, so at most a single space precedes each newline.
+    cleaned_content = cleaned_content.replace(' \n', '\n')
+    
+    # Clean up multiple blank lines (more than 2 consecutive)
+    cleaned_content = _MULTI_BLANK.sub('\n\n', cleaned_content)
     
     return cleaned_content.strip()
 
-def convert_file_to_markdown(input_file: str, output_file: Optional[str] = None) -> Tuple[bool, str]:
+# Only defined on Windows, the one platform where it is called; the
+# platform check also lets type checkers skip the Windows-only APIs
+if sys.platform == 'win32':
+    def _open_shared(path: Path):
+        """
+        Open a file for binary reading on Windows while letting other processes
+        keep reading, writing or deleting it.
+        
+        Python's open() does not pass FILE_SHARE_DELETE, so files held open by
+        programs that requested delete access fail with a sharing violation.
+        """
+        import ctypes
+        import msvcrt
+        from ctypes import wintypes
+        
+        GENERIC_READ = 0x80000000
+        FILE_SHARE_ALL = 0x1 | 0x2 | 0x4  # FILE_SHARE_READ | WRITE | DELETE
+        OPEN_EXISTING = 3
+        FILE_ATTRIBUTE_NORMAL = 0x80
+        INVALID_HANDLE_VALUE = wintypes.HANDLE(-1).value
+        
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        kernel32.CreateFileW.restype = wintypes.HANDLE
+        kernel32.CreateFileW.argtypes = [
+            wintypes.LPCWSTR, wintypes.DWORD, wintypes.DWORD, wintypes.LPVOID,
+            wintypes.DWORD, wintypes.DWORD, wintypes.HANDLE,
+        ]
+        kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+        handle = kernel32.CreateFileW(
+            str(path), GENERIC_READ, FILE_SHARE_ALL, None, OPEN_EXISTING, FILE_ATTRIBUTE_NORMAL, None
+        )
+        if handle == INVALID_HANDLE_VALUE:
+            raise ctypes.WinError(ctypes.get_last_error())
+        try:
+            fd = msvcrt.open_osfhandle(handle, os.O_RDONLY | os.O_BINARY)
+        except OSError:
+            kernel32.CloseHandle(handle)
+            raise
+        return os.fdopen(fd, 'rb')
+
+def _write_utf8(path: Path, *parts: str) -> None:
+    """
+    Write parts to path as UTF-8 with raw os.write calls, skipping the text
+    layer's chunked encoding. Newlines are written as-is on every platform.
+    """
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
+    fd = os.open(path, flags, 0o666)
+    try:
+        for part in parts:
+            data = memoryview(part.encode('utf-8'))
+            # os.write may write less than asked for very large buffers
+            while data:
+                data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
+
+# Inputs converted by this process, least recently used first. Keyed by path
+# so a new version of a file replaces the entry for the old one:
+# resolved input path -> (mtime_ns, size, output path, output mtime_ns)
+_CONVERT_CACHE: "OrderedDict[str, tuple]" = OrderedDict()
+_CONVERT_CACHE_LOCK = threading.Lock()
+_CONVERT_CACHE_SIZE = 4096
+
+def _output_path(resolved_input: Path, output_file: Optional[str]) -> Path:
+    """Return output_file as a Path, or the input name with a .md extension."""
+    return Path(output_file) if output_file else resolved_input.with_suffix('.md')
+
+def _cached_output(resolved_input: Path, st: os.stat_result, output_path: Path) -> bool:
+    """Check the cache for this version of resolved_input converted to output_path."""
+    key = str(resolved_input)
+    with _CONVERT_CACHE_LOCK:
+        cached = _CONVERT_CACHE.get(key)
+        if cached is not None:
+            _CONVERT_CACHE.move_to_end(key)
+    if cached is None or cached[:3] != (st.st_mtime_ns, st.st_size, output_path):
+        return False
+    # The output must also be untouched since it was written
+    try:
+        return output_path.stat().st_mtime_ns == cached[3]
+    except OSError:
+        return False
+
+def _record_conversion(resolved_input: Path, st: os.stat_result, output_path: Path) -> None:
+    """Cache this version of resolved_input as converted to output_path."""
+    try:
+        output_mtime = output_path.stat().st_mtime_ns
+    except OSError:
+        return
+    key = str(resolved_input)
+    with _CONVERT_CACHE_LOCK:
+        _CONVERT_CACHE[key] = (st.st_mtime_ns, st.st_size, output_path, output_mtime)
+        _CONVERT_CACHE.move_to_end(key)
+        while len(_CONVERT_CACHE) > _CONVERT_CACHE_SIZE:
+            _CONVERT_CACHE.popitem(last=False)
+
+def already_converted(
+    input_file: str, output_file: Optional[str] = None, input_stat: Optional[os.stat_result] = None
+) -> Optional[Path]:
+    """
+    Check whether the current version of a file was already converted.
+    
+    Args:
+        input_file: Path to the input file
+        output_file: Optional path for output file. If not provided, uses input name with .md extension
+        input_stat: os.stat result of the input, if the caller already has one
+        
+    Returns:
+        The output path if this process converted the file as it is now and the
+        output is untouched since, otherwise None
+    """
+    try:
+        if input_stat is None:
+            input_stat = os.stat(input_file)
+    except OSError:
+        return None
+    resolved_input = Path(os.path.realpath(input_file))
+    output_path = _output_path(resolved_input, output_file)
+    return output_path if _cached_output(resolved_input, input_stat, output_path) else None
+
+def remember_conversion(
+    input_file: str, output_file: Optional[str] = None, input_stat: Optional[os.stat_result] = None
+) -> None:
+    """
+    Record a finished conversion for already_converted. Nothing is recorded
+    if the input or output can no longer be read.
+    
+    Args:
+        input_file: Path to the input file
+        output_file: Optional path for output file. If not provided, uses input name with .md extension
+        input_stat: os.stat result of the input from before the conversion read it.
+            If not provided, the input is checked now
+    """
+    try:
+        if input_stat is None:
+            input_stat = os.stat(input_file)
+    except OSError:
+        return
+    resolved_input = Path(os.path.realpath(input_file))
+    _record_conversion(resolved_input, input_stat, _output_path(resolved_input, output_file))
+
+# MarkItDown instance shared by every task a pool worker process handles
+_WORKER_MD: Optional[MarkItDown] = None
+
+def _init_worker() -> None:
+    """Build the MarkItDown instance once when a pool worker process starts."""
+    global _WORKER_MD
+    _WORKER_MD = MarkItDown()
+
+def make_executor(max_workers: int) -> ProcessPoolExecutor:
+    """
+    Create a process pool whose workers each build one MarkItDown instance
+    and reuse it for every file they convert.
+    
+    Args:
+        max_workers: Number of worker processes
+        
+    Returns:
+        The executor; submit worker_convert to it to convert a file
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker)
+
+def worker_ready() -> bool:
+    """No-op task used to start make_executor workers ahead of the first conversion."""
+    return _WORKER_MD is not None
+
+def worker_convert(input_file: str) -> Tuple[bool, str]:
+    """Convert a file inside a make_executor worker, reusing its MarkItDown instance."""
+    return convert_file_to_markdown(input_file, md=_WORKER_MD)
+
+def convert_file_to_markdown(
+    input_file: str, output_file: Optional[str] = None, md: Optional[MarkItDown] = None
+) -> Tuple[bool, str]:
     """
     Convert a file to Markdown format using markitdown.
     
     Args:
         input_file: Path to the input file
         output_file: Optional path for output file. If not provided, uses input name with .md extension
+        md: Optional MarkItDown instance to reuse. If not provided, a new one is created
         
     Returns:
         Tuple of (success: bool, message: str)
     """
     
-    # Validate input file exists
-    input_path = Path(input_file)
-    if not input_path.exists():
+    # Validate input file exists, keeping the stat result for the cache key
+    try:
+        st = os.stat(input_file)
+    except OSError:
         return False, f"File does not exist: {input_file}"
     
     # Resolve full path
-    resolved_input = input_path.resolve()
+    resolved_input = Path(os.path.realpath(input_file))
     
     # Determine output file path
-    if output_file:
-        output_path = Path(output_file)
-    else:
-        output_path = resolved_input.with_suffix('.md')
+    output_path = _output_path(resolved_input, output_file)
     
-    # Create a temporary file to avoid file locks
-    temp_fd, temp_file = tempfile.mkstemp(suffix=resolved_input.suffix)
-    os.close(temp_fd)
-
     try:
-        # Try to copy the source file to temp location with retry logic
-        max_retries = 3
-        retry_delay = 0.5
-        for attempt in range(max_retries):
-            try:
-                shutil.copy2(resolved_input, temp_file)
-                break
-            except (IOError, OSError) as e:
-                if "being used by another process" in str(e) or "Permission denied" in str(e):
-                    if attempt < max_retries - 1:
-                        import time
-                        time.sleep(retry_delay)
-                        retry_delay *= 2  # Exponential backoff
-                        continue
-                    else:
-                        # If all retries failed, try reading and writing manually
-                        try:
-                            with open(resolved_input, 'rb') as src:
-                                content = src.read()
-                            with open(temp_file, 'wb') as dst:
-                                dst.write(content)
-                        except Exception as read_error:
-                            return False, f"File is in use and cannot be accessed: {str(read_error)}"
-                else:
-                    raise
-        
-        # Build the header for the markdown file
-        header = f"# File: {resolved_input.name}\n# Path: {resolved_input}\n\n"
+        # Skip the conversion if this exact version of the file was already converted
+        if _cached_output(resolved_input, st, output_path):
+            return True, f"Already converted (unchanged): {output_path}"
         
-        # Use MarkItDown directly instead of subprocess
+        # Read the source in place. If another process holds it open, retry
+        # once with a share-everything open instead of waiting for the lock.
         try:
-            markitdown = MarkItDown()
-            result = markitdown.convert(temp_file)
-            output_content = result.markdown if result.markdown else ""
-        except Exception as e:
-            error_msg = f"markitdown conversion failed: {str(e)}"
-            return False, error_msg
+            source = open(resolved_input, 'rb')
+        except (IOError, OSError) as e:
+            if "being used by another process" not in str(e) and "Permission denied" not in str(e):
+                raise
+            if sys.platform == 'win32':
+                try:
+                    source = _open_shared(resolved_input)
+                except OSError as shared_error:
+                    return False, f"File is in use and cannot be accessed: {str(shared_error)}"
+            else:
+                # POSIX opens already share, so this is a real permission error
+                return False, f"File is in use and cannot be accessed: {str(e)}"
+        
+        # Build the header for the markdown file. It is not passed through
+        # clean_markdown_content, so the name and path are written exactly as
+        # they are on disk, even when they contain repeated spaces or text
+        # such as "Page 1 of 2" that cleanup would remove from the body.
+        header = f"File: {resolved_input.name}\nPath: {resolved_input}"
         
-        # Combine header and content, then clean everything
-        full_content = header + output_content
-        cleaned_content = clean_markdown_content(full_content)
+        # Use MarkItDown directly instead of subprocess
+        with source:
+            try:
+                markitdown = md if md is not None else MarkItDown()
+                result = markitdown.convert_stream(
+                    source,
+                    stream_info=StreamInfo(
+                        local_path=str(resolved_input),
+                        extension=resolved_input.suffix,
+                        filename=resolved_input.name,
+                    ),
+                )
+                output_content = result.markdown if result.markdown else ""
+                del result
+            except Exception as e:
+                error_msg = f"markitdown conversion failed: {str(e)}"
+                return False, error_msg
         
-        # Write cleaned markdown content to output file
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(cleaned_content)
+        # Clean the body on its own rather than a header + body copy, and drop
+        # the raw content as soon as the cleaned version exists
+        cleaned_body = clean_markdown_content(output_content)
+        del output_content
         
+        # Write header and cleaned markdown content to output file
+        if cleaned_body:
+            _write_utf8(output_path, header, '\n\n', cleaned_body)
+        else:
+            _write_utf8(output_path, header)
+        
+        _record_conversion(resolved_input, st, output_path)
         return True, f"Successfully converted to: {output_path}"
         
     except Exception as e:
         return False, f"Error during conversion: {str(e)}"
-    finally:
-        # Clean up temp file
-        if os.path.exists(temp_file):
-            try:
-                os.remove(temp_file)
-            except:
-                pass
 
 def batch_convert(file_paths: list, max_workers: Optional[int] = None) -> dict:
     """
@@ -193,11 +418,12 @@ def batch_convert(file_paths: list, max_workers: Optional[int] = None) -> dict:
     
     results = {}
     
-    # Use ProcessPoolExecutor for true parallel processing
-    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+    # Use ProcessPoolExecutor for true parallel processing, with one
+    # MarkItDown instance built per worker rather than per file
+    with make_executor(max_workers) as executor:
         # Submit all conversion tasks
         future_to_file = {
-            executor.submit(convert_file_to_markdown, file_path): file_path 
+            executor.submit(worker_convert, file_path): file_path 
             for file_path in file_paths
         }
         
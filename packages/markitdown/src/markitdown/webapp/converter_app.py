@@ -1,24 +1,53 @@
-from flask import Flask, render_template_string, request, jsonify
+from flask import Flask, render_template_string, request, Response
 import os
 import glob
+import json
+import queue
 import threading
-from concurrent.futures import ThreadPoolExecutor
+import heapq
+import itertools
+from concurrent.futures.process import BrokenProcessPool
 import time
 from datetime import datetime
 import traceback
-from convert_to_markdown import convert_file_to_markdown
+from convert_to_markdown import (
+    already_converted, make_executor, remember_conversion, worker_convert, worker_ready
+)
 import multiprocessing
 
+# orjson is optional; it serializes the status dict several times faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 app = Flask(__name__)
 
 # Store conversion status
 conversion_status = {}
-conversion_lock = threading.Lock()
+conversion_lock = threading.RLock()
+
+# Bumped on every status change; served as the ETag of /status
+status_version = 0
+
+# One queue per connected /events client; status changes are pushed to each
+status_subscribers = []
+
+# Seconds between keep-alive comments on idle /events streams
+EVENTS_KEEPALIVE = 15
 
 # Get number of CPU cores for parallel processing
-MAX_WORKERS = max(1, ((multiprocessing.cpu_count()/2) - 1))  # Leave one core free
+CPU_COUNT = multiprocessing.cpu_count()
+MAX_WORKERS = max(2, CPU_COUNT - 1) if CPU_COUNT > 2 else 1  # Leave one core free
 #MAX_WORKERS = 4  # Leave one core free
 
+# Times a file is retried after a worker process dies while converting it.
+# Every file in flight fails when the pool breaks, not just the one at fault
+POOL_CRASH_RETRIES = 2
+
+# Extensions picked up when a directory is given instead of a file or pattern
+DIRECTORY_EXTENSIONS = {'.pdf', '.docx', '.pptx'}
+
 HTML_TEMPLATE = '''
 <!DOCTYPE html>
 <html lang="en">
@@ -290,7 +319,13 @@ C:\\Users\\**\\*.pptx"></textarea>
     </div>
     
     <script>
-        let statusUpdateInterval;
+        // Status of every file, loaded from /status and kept current by /events.
+        // statusVersion is the server version statusData reflects, and events
+        // that arrive while /status is loading wait in pendingEvents so an
+        // older snapshot cannot overwrite them.
+        let statusData = {};
+        let statusVersion = -1;
+        let pendingEvents = null;
         
         function convertFiles() {
             const paths = document.getElementById('paths').value.trim();
@@ -311,8 +346,6 @@ C:\\Users\\**\\*.pptx"></textarea>
             .then(data => {
                 if (data.error) {
                     alert('Error: ' + data.error);
-                } else {
-                    refreshStatus();
                 }
                 document.getElementById('convertBtn').disabled = false;
             })
@@ -327,13 +360,57 @@ C:\\Users\\**\\*.pptx"></textarea>
         }
         
         function refreshStatus() {
-            fetch('/status')
-            .then(response => response.json())
-            .then(data => {
-                updateStatusDisplay(data);
+            if (pendingEvents === null) {
+                pendingEvents = [];
+            }
+            const headers = statusVersion >= 0 ? {'If-None-Match': '"' + statusVersion + '"'} : {};
+            fetch('/status', {headers: headers, cache: 'no-store'})
+            .then(response => {
+                if (response.status === 304) {
+                    return;
+                }
+                // The ETag is the status version the snapshot reflects
+                const version = Number(response.headers.get('ETag').replace(/[^0-9]/g, ''));
+                return response.json().then(data => {
+                    // A snapshot older than the last applied event is ignored
+                    if (version > statusVersion) {
+                        statusData = data;
+                        statusVersion = version;
+                    }
+                });
+            })
+            .finally(() => {
+                // Replay buffered events; those already in the snapshot are skipped
+                const events = pendingEvents || [];
+                pendingEvents = null;
+                events.forEach(applyDelta);
+                updateStatusDisplay(statusData);
             });
         }
         
+        function applyDelta(delta) {
+            if (delta.version <= statusVersion) {
+                return;
+            }
+            statusVersion = delta.version;
+            if (delta.cleared) {
+                statusData = {};
+            } else {
+                const {file, version, ...status} = delta;
+                statusData[file] = status;
+            }
+        }
+        
+        function onStatusEvent(e) {
+            const delta = JSON.parse(e.data);
+            if (pendingEvents !== null) {
+                pendingEvents.push(delta);
+            } else {
+                applyDelta(delta);
+                updateStatusDisplay(statusData);
+            }
+        }
+        
         function updateStatusDisplay(statusData) {
             const statusList = document.getElementById('statusList');
             
@@ -376,14 +453,25 @@ C:\\Users\\**\\*.pptx"></textarea>
         }
         
         function clearStatus() {
-            fetch('/clear', {method: 'POST'})
-            .then(() => refreshStatus());
-        }
-        
-        // Auto-refresh status every 2 seconds
-        setInterval(refreshStatus, 2000);
+            fetch('/clear', {method: 'POST'});
+        }
+        
+        // Status changes are pushed by the server. Load the full status
+        // whenever the stream (re)connects, to pick up anything missed. On a
+        // reconnect the server may have restarted and reset its version, so
+        // start over.
+        let statusStreamOpened = false;
+        const statusEvents = new EventSource('/events');
+        statusEvents.onopen = () => {
+            if (statusStreamOpened) {
+                statusVersion = -1;
+            }
+            statusStreamOpened = true;
+            refreshStatus();
+        };
+        statusEvents.onmessage = onStatusEvent;
         
-        // Initial status load
+        // Show the history right away instead of waiting for the stream
         refreshStatus();
         
         // Handle Enter key in textarea (Ctrl+Enter to submit)
@@ -397,46 +485,173 @@ C:\\Users\\**\\*.pptx"></textarea>
 </html>
 '''
 
-# Global thread pool executor for background conversions
-executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+# Global process pool for background conversions. Parsing is CPU-bound and
+# holds the GIL, so each worker is a separate process with its own MarkItDown
+executor = make_executor(MAX_WORKERS)
 
-def process_single_file(file_path):
-    """Process a single file conversion"""
-    try:
-        # Update status to processing
+# Files waiting for a free worker, as a heap of (size, sequence, path) so the
+# smallest files go first and one large document cannot hold up a batch of
+# small ones. Only MAX_WORKERS files are handed to the pool at a time so that
+# "Processing" reflects what is actually running.
+pending_files = []
+pending_sequence = itertools.count()
+running_count = 0
+
+# Pool crashes seen per file, for POOL_CRASH_RETRIES
+pool_crash_counts = {}
+
+# Files queued or converting. Kept apart from conversion_status, which /clear
+# empties, so a file is never queued twice and converted by two workers at once
+in_flight_files = set()
+
+def json_dumps(data):
+    """Serialize data to JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data).encode('utf-8')
+
+def json_loads(data):
+    """Parse JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def json_response(data, status=200):
+    """Build a JSON response without going through Flask's jsonify"""
+    return app.response_class(json_dumps(data), status=status, mimetype='application/json')
+
+def publish_event(event):
+    """Push a status event to every connected /events client"""
+    for subscriber in list(status_subscribers):
+        subscriber.put(event)
+
+def set_status(file_path, status, message):
+    """Record the status of a file (caller holds conversion_lock)"""
+    global status_version
+    conversion_status[file_path] = {
+        'status': status,
+        'message': message,
+        'timestamp': datetime.now().isoformat()
+    }
+    # Bump the version only once the entry is in place; /status reads the
+    # version without the lock and relies on the data being at least as new
+    status_version += 1
+    publish_event({'file': file_path, 'version': status_version, **conversion_status[file_path]})
+
+def warm_up_workers():
+    """Start every pool worker now, so process start-up, imports and MarkItDown
+    construction happen before the first conversion rather than during it"""
+    for _ in range(MAX_WORKERS):
+        executor.submit(worker_ready)
+
+def replace_broken_executor(broken):
+    """Start a new process pool if broken is still the current one; a pool
+    whose worker died rejects all further work (caller holds conversion_lock)"""
+    global executor
+    if executor is not broken:
+        return  # Already replaced by another callback of the same crash
+    print("A worker process stopped unexpectedly; restarting the process pool")
+    executor = make_executor(MAX_WORKERS)
+    broken.shutdown(wait=False)
+    warm_up_workers()
+
+def requeue_file(file_path, size):
+    """Put a file back in the queue (caller holds conversion_lock)"""
+    set_status(file_path, 'Queued', 'Worker process stopped, retrying')
+    heapq.heappush(pending_files, (size, next(pending_sequence), file_path))
+
+def dispatch_pending():
+    """Submit queued files to the process pool while workers are free"""
+    global running_count
+    while True:
         with conversion_lock:
-            conversion_status[file_path] = {
-                'status': 'Processing',
-                'message': 'Converting to Markdown...',
-                'timestamp': datetime.now().isoformat()
-            }
+            if not pending_files or running_count >= MAX_WORKERS:
+                return
+            _, _, file_path = heapq.heappop(pending_files)
+            running_count += 1  # Hold a worker slot while the file is checked
+        
+        # Filesystem checks run without the lock, which every completion
+        # callback and /convert need, as they can be slow on network paths.
+        # The stat is taken before the worker reads the file, so a change
+        # made during the conversion is not recorded as converted.
+        try:
+            input_stat = os.stat(file_path)
+        except OSError:
+            input_stat = None  # Let the worker report the missing file
+        # Each worker process only caches its own conversions, so check
+        # here for files that are unchanged since any earlier conversion
+        output_path = None
+        if input_stat is not None:
+            output_path = already_converted(file_path, input_stat=input_stat)
         
-        # Run the Python conversion function
-        success, message = convert_file_to_markdown(file_path)
-        
-        # Update status based on result
         with conversion_lock:
-            if success:
-                conversion_status[file_path] = {
-                    'status': 'Completed',
-                    'message': message,
-                    'timestamp': datetime.now().isoformat()
-                }
-            else:
-                conversion_status[file_path] = {
-                    'status': 'Error',
-                    'message': message,
-                    'timestamp': datetime.now().isoformat()
-                }
+            if output_path is not None:
+                running_count -= 1
+                in_flight_files.discard(file_path)
+                set_status(file_path, 'Completed', f'Already converted (unchanged): {output_path}')
+                continue
+            
+            set_status(file_path, 'Processing', 'Converting to Markdown...')
+            try:
+                try:
+                    future = executor.submit(worker_convert, file_path)
+                except BrokenProcessPool:
+                    replace_broken_executor(executor)
+                    future = executor.submit(worker_convert, file_path)
+            except Exception as e:
+                running_count -= 1
+                in_flight_files.discard(file_path)
+                set_status(file_path, 'Error', f'Error: {str(e)}')
+                continue
+            future.add_done_callback(
+                lambda f, p=file_path, st=input_stat, pool=executor:
+                    on_conversion_done(p, f, st, pool))
+
+def on_conversion_done(file_path, future, input_stat=None, pool=None):
+    """Record the result of a finished conversion and start the next one"""
+    global running_count
+    crashed = False
+    try:
+        success, message = future.result()
+    except BrokenProcessPool as e:
+        crashed = True
+        success, message = False, f'Error: worker process stopped unexpectedly ({e})'
+        print(f"Worker process died while converting {file_path}")
     except Exception as e:
-        with conversion_lock:
-            conversion_status[file_path] = {
-                'status': 'Error',
-                'message': f'Error: {str(e)}',
-                'timestamp': datetime.now().isoformat()
-            }
+        success, message = False, f'Error: {str(e)}'
         print(f"Conversion error for {file_path}: {e}")
-        traceback.print_exc()
+        traceback.print_exception(e)
+    
+    # Record the conversion before taking the lock, as it stats the output
+    if success and input_stat is not None:
+        remember_conversion(file_path, input_stat=input_stat)
+    
+    # Update status based on result
+    with conversion_lock:
+        running_count -= 1
+        if crashed and pool is not None:
+            replace_broken_executor(pool)
+        if crashed and pool_crash_counts.get(file_path, 0) < POOL_CRASH_RETRIES:
+            pool_crash_counts[file_path] = pool_crash_counts.get(file_path, 0) + 1
+            requeue_file(file_path, input_stat.st_size if input_stat is not None else 0)
+        else:
+            pool_crash_counts.pop(file_path, None)
+            in_flight_files.discard(file_path)
+            if success:
+                set_status(file_path, 'Completed', message)
+            else:
+                set_status(file_path, 'Error', message)
+    dispatch_pending()
+
+def iter_matching_files(root, extensions):
+    """Yield files directly inside root whose lowercased extension is in extensions"""
+    with os.scandir(root) as entries:
+        for entry in entries:
+            # Match glob's behaviour of skipping hidden files
+            if entry.name.startswith('.'):
+                continue
+            if os.path.splitext(entry.name)[1].lower() in extensions and entry.is_file():
+                yield entry.path
 
 @app.route('/')
 def index():
@@ -445,7 +660,7 @@ def index():
 @app.route('/convert', methods=['POST'])
 def convert():
     try:
-        data = request.json
+        data = json_loads(request.get_data())
         paths = data.get('paths', [])
         
         files_to_convert = []
@@ -459,17 +674,9 @@ def convert():
             if (path.startswith('"') and path.endswith('"')) or (path.startswith("'") and path.endswith("'")):
                 path = path[1:-1]
                 
-            # Handle glob patterns
+            # Handle glob patterns (recursive when the pattern contains **)
             if '*' in path or '?' in path:
-                # Convert Windows path to glob pattern
-                if '**' in path:
-                    # Recursive glob
-                    matched_files = glob.glob(path, recursive=True)
-                else:
-                    # Normal glob
-                    matched_files = glob.glob(path)
-                    
-                for file in matched_files:
+                for file in glob.iglob(path, recursive='**' in path):
                     if os.path.isfile(file):
                         files_to_convert.append(file)
             else:
@@ -478,47 +685,97 @@ def convert():
                     files_to_convert.append(path)
                 elif os.path.isdir(path):
                     # If it's a directory, get all supported files
-                    for ext in ['*.pdf', '*.docx', '*.pptx']:
-                        matched = glob.glob(os.path.join(path, ext))
-                        files_to_convert.extend(matched)
+                    files_to_convert.extend(iter_matching_files(path, DIRECTORY_EXTENSIONS))
         
-        # Submit files for parallel processing
+        # Collapse paths matched by more than one pattern into a single task
+        files_to_convert = list(dict.fromkeys(files_to_convert))
+        
+        # Sizes order the queue; unreadable files sort first and fail fast
+        file_sizes = {}
         for file_path in files_to_convert:
-            with conversion_lock:
-                conversion_status[file_path] = {
-                    'status': 'Queued',
-                    'message': 'Waiting to be processed',
-                    'timestamp': datetime.now().isoformat()
-                }
-            # Submit to thread pool for parallel processing
-            executor.submit(process_single_file, file_path)
+            try:
+                file_sizes[file_path] = os.path.getsize(file_path)
+            except OSError:
+                file_sizes[file_path] = 0
         
-        return jsonify({
+        # Queue files for parallel processing, skipping any still in flight
+        # from an earlier submission
+        with conversion_lock:
+            files_to_convert = [
+                file_path for file_path in files_to_convert if file_path not in in_flight_files
+            ]
+            for file_path in files_to_convert:
+                in_flight_files.add(file_path)
+                set_status(file_path, 'Queued', 'Waiting to be processed')
+                heapq.heappush(pending_files, (file_sizes[file_path], next(pending_sequence), file_path))
+        dispatch_pending()
+        
+        return json_response({
             'success': True,
             'queued': len(files_to_convert),
             'files': files_to_convert
         })
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, status=500)
 
 @app.route('/status')
 def status():
-    with conversion_lock:
-        return jsonify(dict(conversion_status))
+    # No lock needed: writers change the dict before bumping the version and
+    # the version is read here before the copy, so the data always includes
+    # every change up to the ETag (at worst it also has a newer one, which
+    # only costs a full response next time). dict() copies atomically under
+    # the GIL.
+    # Entries are replaced rather than mutated, so the copy is safe to
+    # serialize while conversions keep updating the live dict.
+    etag = str(status_version)
+    # Nothing changed since the client's copy, skip serialization entirely
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        response = json_response(dict(conversion_status))
+    response.set_etag(etag)
+    return response
+
+@app.route('/events')
+def events():
+    """Stream status changes to the browser as Server-Sent Events"""
+    subscriber = queue.Queue()
+    status_subscribers.append(subscriber)
+    
+    def generate():
+        try:
+            # The server only sends the response headers with the first
+            # chunk, so send one now rather than with the first event
+            yield ': connected\n\n'
+            while True:
+                try:
+                    event = subscriber.get(timeout=EVENTS_KEEPALIVE)
+                except queue.Empty:
+                    # Comment line keeps the connection open and detects closed clients
+                    yield ': keep-alive\n\n'
+                    continue
+                yield f'data: {json_dumps(event).decode()}\n\n'
+        finally:
+            status_subscribers.remove(subscriber)
+    
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache'})
 
 @app.route('/clear', methods=['POST'])
 def clear():
-    global conversion_status
+    global conversion_status, status_version
     with conversion_lock:
         conversion_status = {}
-    return jsonify({'success': True})
+        status_version += 1  # After the rebind, as in set_status
+        publish_event({'cleared': True, 'version': status_version})
+    return json_response({'success': True})
 
 if __name__ == '__main__':
     print("\nFile to Markdown Converter")
     print("=" * 50)
     print(f"Parallel Processing: {MAX_WORKERS} workers")
-    print(f"CPU Cores Available: {multiprocessing.cpu_count()}")
+    print(f"CPU Cores Available: {CPU_COUNT}")
     print("Open http://localhost:5555 in your browser")
     print("Tips:")
     print("   - Use wildcards: *.pdf, *.docx, *.pptx")
@@ -528,4 +785,5 @@ if __name__ == '__main__':
     print("=" * 50)
     print()
     
+    warm_up_workers()
     app.run(debug=False, port=5555, host='0.0.0.0')
\ No newline at end of file
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3 -m pytest
+import os
+from collections import OrderedDict
+
+import pytest
+
+from markitdown.webapp import convert_to_markdown
+from markitdown.webapp.convert_to_markdown import (
+    already_converted,
+    remember_conversion,
+)
+
+# Fixed timestamps, so the tests do not depend on filesystem time resolution
+MTIME_NS = 1_700_000_000_000_000_000
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(convert_to_markdown, "_CONVERT_CACHE", OrderedDict())
+
+
+def _make_converted(tmp_path, name="doc"):
+    """Create an input and its default output, and record the conversion."""
+    input_file = tmp_path / f"{name}.docx"
+    input_file.write_bytes(b"input")
+    os.utime(input_file, ns=(MTIME_NS, MTIME_NS))
+    output_file = tmp_path / f"{name}.md"
+    output_file.write_text("output")
+    os.utime(output_file, ns=(MTIME_NS, MTIME_NS))
+    remember_conversion(str(input_file))
+    return input_file, output_file
+
+
+def test_unchanged_input_is_converted(tmp_path):
+    input_file, output_file = _make_converted(tmp_path)
+    assert already_converted(str(input_file)) == output_file
+    assert already_converted(str(input_file), str(output_file)) == output_file
+
+
+def test_never_converted(tmp_path):
+    input_file = tmp_path / "doc.docx"
+    input_file.write_bytes(b"input")
+    assert already_converted(str(input_file)) is None
+    assert already_converted(str(tmp_path / "missing.docx")) is None
+
+
+def test_input_mtime_change_invalidates(tmp_path):
+    input_file, _ = _make_converted(tmp_path)
+    os.utime(input_file, ns=(MTIME_NS, MTIME_NS + 1))
+    assert already_converted(str(input_file)) is None
+
+
+def test_input_size_change_invalidates(tmp_path):
+    input_file, _ = _make_converted(tmp_path)
+    input_file.write_bytes(b"longer input")
+    os.utime(input_file, ns=(MTIME_NS, MTIME_NS))
+    assert already_converted(str(input_file)) is None
+
+
+def test_rewritten_output_invalidates(tmp_path):
+    input_file, output_file = _make_converted(tmp_path)
+    os.utime(output_file, ns=(MTIME_NS, MTIME_NS + 1))
+    assert already_converted(str(input_file)) is None
+
+
+def test_deleted_output_invalidates(tmp_path):
+    input_file, output_file = _make_converted(tmp_path)
+    output_file.unlink()
+    assert already_converted(str(input_file)) is None
+
+
+def test_different_output_file_misses(tmp_path):
+    input_file, _ = _make_converted(tmp_path)
+    other_output = tmp_path / "other.md"
+    other_output.write_text("output")
+    assert already_converted(str(input_file), str(other_output)) is None
+
+
+def test_stat_from_before_conversion_is_used(tmp_path):
+    input_file, _ = _make_converted(tmp_path)
+    stale_stat = os.stat(input_file)
+    # The input changes while it is being converted
+    os.utime(input_file, ns=(MTIME_NS, MTIME_NS + 1))
+    remember_conversion(str(input_file), input_stat=stale_stat)
+    assert already_converted(str(input_file)) is None
+
+
+def test_missing_output_is_not_recorded(tmp_path):
+    input_file = tmp_path / "doc.docx"
+    input_file.write_bytes(b"input")
+    remember_conversion(str(input_file))
+    remember_conversion(str(tmp_path / "missing.docx"))
+    assert len(convert_to_markdown._CONVERT_CACHE) == 0
+    assert already_converted(str(input_file)) is None
+
+
+def test_new_version_replaces_entry(tmp_path):
+    input_file, _ = _make_converted(tmp_path)
+    os.utime(input_file, ns=(MTIME_NS, MTIME_NS + 1))
+    remember_conversion(str(input_file))
+    assert len(convert_to_markdown._CONVERT_CACHE) == 1
+    assert already_converted(str(input_file)) is not None
+
+
+def test_lru_evicts_at_cap(tmp_path, monkeypatch):
+    monkeypatch.setattr(convert_to_markdown, "_CONVERT_CACHE_SIZE", 2)
+    first, _ = _make_converted(tmp_path, "first")
+    second, _ = _make_converted(tmp_path, "second")
+    # A lookup makes "first" the most recently used entry
+    assert already_converted(str(first)) is not None
+    third, _ = _make_converted(tmp_path, "third")
+    assert len(convert_to_markdown._CONVERT_CACHE) == 2
+    assert already_converted(str(second)) is None
+    assert already_converted(str(first)) is not None
+    assert already_converted(str(third)) is not None
+
+
+if __name__ == "__main__":
+    """Runs this file's tests from the command line."""
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for test in (
+            test_unchanged_input_is_converted,
+            test_input_mtime_change_invalidates,
+            test_rewritten_output_invalidates,
+            test_different_output_file_misses,
+            test_missing_output_is_not_recorded,
+        ):
+            convert_to_markdown._CONVERT_CACHE.clear()
+            test_dir = Path(tmp_dir) / test.__name__
+            test_dir.mkdir()
+            test(test_dir)
+    print("All tests passed!")
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3 -m pytest
+import random
+import re
+
+import pytest
+
+from markitdown.webapp.convert_to_markdown import clean_markdown_content
+
+# These tests pin the behaviour of the web app's markdown cleanup, which has
+# several fast paths (str.replace for literals, substring prechecks for the
+# regexes, collapsed whitespace passes) that must agree with plain
+# case-insensitive regex substitution.
+
+BASELINE_LITERALS = [
+    ("RESTRICTED, NON-SENSITIVE", ""),
+    ("RESTRICTED NON-SENSITIVE", ""),
+    ("RESTRICTED,NON-SENSITIVE", ""),
+    ("RESTRICTED - NON-SENSITIVE", ""),
+    ("RESTRICTED-NON-SENSITIVE", ""),
+    ("# File:", "File:"),
+    ("# Path:", "Path:"),
+]
+
+BASELINE_PATTERNS = [
+    (r"Page \d+ of \d+", ""),
+    (r"Copyright.*\d{4}", ""),
+]
+
+
+def _reference_clean(content: str) -> str:
+    """Straightforward regex version of clean_markdown_content."""
+    if not content:
+        return ""
+    for literal, repl in BASELINE_LITERALS:
+        content = re.sub(re.escape(literal), repl, content, flags=re.IGNORECASE)
+    for pattern, repl in BASELINE_PATTERNS:
+        content = re.sub(pattern, repl, content, flags=re.IGNORECASE)
+    content = re.sub(r"[ \t]+", " ", content)
+    content = re.sub(r"[ \t]+$", "", content, flags=re.MULTILINE)
+    content = re.sub(r"\n{3,}", "\n\n", content)
+    return content.strip()
+
+
+@pytest.mark.parametrize(
+    "content,expected",
+    [
+        # Literal casings: as written, upper, title and lower
+        ("a RESTRICTED, NON-SENSITIVE b", "a b"),
+        ("a Restricted - Non-Sensitive b", "a b"),
+        ("a restricted-non-sensitive b", "a b"),
+        ("a RESTRICTED NON-SENSITIVE b RESTRICTED,NON-SENSITIVE c", "a b c"),
+        # Mixed casings in one document
+        ("a RESTRICTED-NON-SENSITIVE b Restricted-Non-Sensitive c", "a b c"),
+        ("a rEsTrIcTeD, nOn-SeNsItIvE b", "a b"),
+        # Characters re.IGNORECASE folds that str.lower() does not
+        ("x RESTRICTED, NON-ſENSITIVE y", "x y"),
+        ("x restrİcted-non-sensıtive y", "x y"),
+        # Header markers
+        ("# File: a.pdf\n# path: /tmp/a.pdf", "File: a.pdf\nPath: /tmp/a.pdf"),
+        ("# FILE: a.pdf", "File: a.pdf"),
+        # Page numbers and copyright notices
+        ("intro\nPage 3 of 10\nbody", "intro\n\nbody"),
+        ("intro page 1 of 2 body", "intro body"),
+        (
+            "text\nCopyright (c) Contoso 2021 all rights\nmore",
+            "text\n all rights\nmore",
+        ),
+        ("COPYRIGHT 1999", ""),
+        ("Copyright notice without a year", "Copyright notice without a year"),
+        # Tab and space collapse
+        ("a  b\t\tc \t d", "a b c d"),
+        # Trailing whitespace and whitespace-only lines
+        ("a  \nb\t\n \t \nc", "a\nb\n\nc"),
+        # Blank lines capped at one empty line
+        ("a\n\n\n\nb", "a\n\nb"),
+        ("a\n \n\n\t\nb", "a\n\nb"),
+        # Leading and trailing whitespace of the document
+        ("\n\n  a  \n\n", "a"),
+        ("", ""),
+        (None, ""),
+    ],
+)
+def test_clean_markdown_content(content, expected):
+    assert clean_markdown_content(content) == expected
+
+
+def test_clean_markdown_content_matches_reference():
+    atoms = [
+        "RESTRICTED, NON-SENSITIVE",
+        "restricted - non-sensitive",
+        "Restricted-Non-Sensitive",
+        "RESTRICTED NON-SENSITIVE",
+        "RESTRICTED,NON-ſENSITIVE",
+        "Page 3 of 10",
+        "page 1 of 2",
+        "Copyright 2021",
+        "copyright (c) Foo 1999 x",
+        "# File:",
+        "# path:",
+        "# FILE:",
+        " ",
+        "  ",
+        "\t",
+        "\n",
+        "\n\n\n",
+        "\r\n",
+        "word",
+        "x y",
+        "#",
+    ]
+    rng = random.Random(0)
+    for _ in range(5000):
+        content = "".join(rng.choice(atoms) for _ in range(rng.randint(0, 30)))
+        assert clean_markdown_content(content) == _reference_clean(content), repr(
+            content
+        )
+
+
+if __name__ == "__main__":
+    """Runs this file's tests from the command line."""
+    test_clean_markdown_content_matches_reference()
+    print("All tests passed!")